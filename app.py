@@ -1,50 +1,530 @@
 import os
-import json
+import base64
+import hashlib
 import math
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
-from flask import Flask, request, jsonify
+from requests.adapters import HTTPAdapter
+from flask import Flask, Response, request, jsonify, send_from_directory
 from PIL import Image
 from io import BytesIO
 import numpy as np
-import mercantile   # make sure mercantile is pinned in requirements
+import orjson
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional; stitch_texture falls back to NumPy
+    njit = None
+
+try:
+    import cupy as cp
+    GPU_ERRORS = (cp.cuda.runtime.CUDARuntimeError, cp.cuda.driver.CUDADriverError,
+                  cp.cuda.memory.OutOfMemoryError, cp.cuda.compiler.CompileException)
+except ImportError:  # cupy is optional; large textures stay on the CPU
+    cp = None
+    GPU_ERRORS = ()
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB
+    _tj = TurboJPEG()
+except (ImportError, OSError, RuntimeError):  # no libjpeg-turbo; decode_jpeg uses Pillow
+    _tj = None
 
 # =====================
 # CONFIG
 # =====================
-TILE_CACHE_DIR = "tiles_json"
+TILE_CACHE_DIR = "tiles_jpg"
+TILE_SIZE = 256
+MAX_LAT = 85.0511287798  # Web Mercator latitude limit
+FETCH_WORKERS = 8
+MAX_ZOOM = 22
+# Per-request limits so one /bbox cannot allocate huge textures or fetch millions of tiles
+MAX_TEXTURE_SIZE = int(os.environ.get("MAX_TEXTURE_SIZE", 8192))  # per dimension
+MAX_BBOX_TILES = int(os.environ.get("MAX_BBOX_TILES", 1024))
+TILE_LRU = int(os.environ.get("TILE_LRU", 512))  # decoded tiles held in memory, ~196 KB each
+CACHE_CONTROL = "public, max-age=86400"
+RESPONSE_CHUNK = 1 << 20  # bytes per write when streaming png/raw textures
+# With TILE_GPU=1 and a CUDA device, textures at least this large are stitched on the GPU
+USE_GPU = cp is not None and os.environ.get("TILE_GPU") == "1"
+GPU_MIN_PIXELS = int(os.environ.get("GPU_MIN_PIXELS", 2048 * 2048))
+GPU_CHUNK_PIXELS = int(os.environ.get("GPU_CHUNK_PIXELS", 1 << 20))  # output pixels per device pass
+# Internal nginx location that aliases TILE_CACHE_DIR, e.g. "/_tiles/"; unset to send files from Flask
+X_ACCEL_PREFIX = os.environ.get("X_ACCEL_PREFIX")
 WMTS_URL = "https://tiles.maps.eox.at/wmts/1.0.0/s2cloudless-2024_3857/default/g/{z}/{y}/{x}.jpg"
 
 os.makedirs(TILE_CACHE_DIR, exist_ok=True)
 app = Flask(__name__)
+app.config["USE_X_SENDFILE"] = os.environ.get("USE_X_SENDFILE") == "1"
+
+# Shared across requests so tile downloads for a bbox run concurrently.
+# Created lazily so each gunicorn worker forked from a preloaded app gets its own.
+_fetch_executor = None
+_fetch_executor_lock = threading.Lock()
+_thread_local = threading.local()
+# Decoded tiles by (z, x, y), least recently used first. An explicit LRU
+# rather than lru_cache so load_tiles can check it without reading the disk.
+_tile_lru = OrderedDict()
+_tile_lru_lock = threading.Lock()
 
 # =====================
 # Helpers
 # =====================
 
 def cache_path(z, x, y):
-    return os.path.join(TILE_CACHE_DIR, f"tile_{z}_{x}_{y}.json")
+    return os.path.join(TILE_CACHE_DIR, f"tile_{z}_{x}_{y}.jpg")
+
+def get_fetch_executor():
+    global _fetch_executor
+    with _fetch_executor_lock:
+        if _fetch_executor is None:
+            _fetch_executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS)
+        return _fetch_executor
+
+def get_session():
+    """Per-thread requests.Session so TCP/TLS connections are reused."""
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _thread_local.session = session
+    return session
 
-def fetch_tile_as_json(x: int, y: int, z: int):
-    """Fetch a single Sentinel-2 tile and convert to a 256x256 RGB list."""
+def fetch_tile_jpeg(x: int, y: int, z: int):
+    """Fetch a single Sentinel-2 tile as the JPEG bytes served by the WMTS."""
     url = WMTS_URL.format(z=z, x=x, y=y)
-    r = requests.get(url, timeout=30)
+    r = get_session().get(url, timeout=30)
     r.raise_for_status()
-    img = Image.open(BytesIO(r.content)).convert("RGB")
-    arr = np.array(img)  # shape (256,256,3)
-    return arr.tolist()
+    return r.content
 
-def cache_tile_json(data, x, y, z):
-    with open(cache_path(z, x, y), "w") as f:
-        json.dump(data, f)
+def decode_jpeg(content):
+    """Decode JPEG bytes straight to an RGB uint8 array, via libjpeg-turbo when available."""
+    if _tj is not None:
+        try:
+            return _tj.decode(content, pixel_format=TJPF_RGB)
+        except OSError:
+            pass  # not something libjpeg-turbo can read; let Pillow try
+    img = Image.open(BytesIO(content)).convert("RGB")
+    return np.asarray(img, dtype=np.uint8)
 
-def load_or_fetch_tile(x, y, z):
+def decode_tile_jpeg(content):
+    """
+    Decode bytes from the WMTS as a tile, raising ValueError unless they are
+    a complete TILE_SIZE RGB JPEG. libjpeg-turbo only warns on a truncated
+    body, so the JPEG markers are checked as well as the decode.
+    """
+    if not (content.startswith(b"\xff\xd8") and content.endswith(b"\xff\xd9")):
+        raise ValueError("WMTS response is not a complete JPEG")
+    arr = decode_jpeg(content)
+    if arr.shape != (TILE_SIZE, TILE_SIZE, 3):
+        raise ValueError(f"WMTS tile has shape {arr.shape}")
+    return arr
+
+def cache_tile_jpeg(jpeg_bytes, x, y, z):
     path = cache_path(z, x, y)
-    if os.path.exists(path):
-        with open(path) as f:
-            return json.load(f)
-    data = fetch_tile_as_json(x, y, z)
-    cache_tile_json(data, x, y, z)
-    return data
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(jpeg_bytes)
+    os.replace(tmp, path)  # readers never see a half-written tile
+
+def fetch_and_cache_tile(x, y, z):
+    """
+    Fetch a tile and return it decoded. It is written to the disk cache only
+    after it decodes, so an error page or truncated body is never cached.
+    """
+    content = fetch_tile_jpeg(x, y, z)
+    arr = decode_tile_jpeg(content)
+    cache_tile_jpeg(content, x, y, z)
+    return arr
+
+def ensure_tile_cached(x, y, z):
+    """Make sure the tile's JPEG is in the disk cache, fetching it if needed."""
+    try:
+        os.stat(cache_path(z, x, y))
+    except FileNotFoundError:
+        fetch_and_cache_tile(x, y, z)
+
+def recall_tile(x, y, z):
+    """Decoded tile from the in-memory LRU, or None."""
+    with _tile_lru_lock:
+        arr = _tile_lru.get((z, x, y))
+        if arr is not None:
+            _tile_lru.move_to_end((z, x, y))
+        return arr
+
+def remember_tile(arr, x, y, z):
+    """Add a decoded tile to the LRU. Arrays are shared between requests, so they are made read-only."""
+    arr.flags.writeable = False
+    with _tile_lru_lock:
+        _tile_lru[(z, x, y)] = arr
+        _tile_lru.move_to_end((z, x, y))
+        while len(_tile_lru) > TILE_LRU:
+            _tile_lru.popitem(last=False)
+    return arr
+
+def load_or_fetch_tile(x, y, z):
+    """Decoded (256,256,3) uint8 tile, fetched and cached on disk as JPEG if missing."""
+    arr = recall_tile(x, y, z)
+    if arr is not None:
+        return arr
+    try:
+        with open(cache_path(z, x, y), "rb") as f:
+            arr = decode_jpeg(f.read())
+    except FileNotFoundError:
+        arr = fetch_and_cache_tile(x, y, z)
+    return remember_tile(arr, x, y, z)
+
+def load_tiles(keys):
+    """
+    Load many (x, y, z) tiles, returned as a list in the order of keys.
+    Tiles already in memory are taken directly; the rest go to the fetch
+    pool, so JPEG decodes from the disk cache run in parallel too.
+    """
+    tiles = [None] * len(keys)
+    futures = {}
+    executor = get_fetch_executor()
+    for i, (x, y, z) in enumerate(keys):
+        tiles[i] = recall_tile(x, y, z)
+        if tiles[i] is None:
+            futures[executor.submit(load_or_fetch_tile, x, y, z)] = i
+    for f in as_completed(futures):
+        i = futures[f]
+        try:
+            tiles[i] = f.result()
+        except Exception as e:
+            for other in futures:
+                other.cancel()
+            raise RuntimeError(f"Failed tile {keys[i]}: {e}") from e
+    return tiles
+
+def lonlat_to_tile(lon, lat, z):
+    """Web Mercator tile (x, y) containing a single lon/lat point."""
+    n = 1 << z
+    lat_rad = math.radians(min(max(lat, -MAX_LAT), MAX_LAT))
+    # the tiny bias puts points on a tile edge into the tile to their south-east
+    x = math.floor(((lon + 180.0) / 360.0 + 1e-14) * n)
+    y = math.floor(((1.0 - math.log(math.tan(lat_rad) + 1.0 / math.cos(lat_rad)) / math.pi) / 2.0 + 1e-14) * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+def tile_ranges(min_lon, min_lat, max_lon, max_lat, z):
+    """
+    Inclusive (x0, x1, y0, y1) tile ranges covering the bbox. A bbox with
+    min_lon > max_lon crosses the antimeridian and is split once into a
+    western and an eastern span, each clamped to [-180, 180] like mercantile.tiles.
+    """
+    if min_lon > max_lon:
+        spans = [(-180.0, max_lon), (min_lon, 180.0)]
+    else:
+        spans = [(min_lon, max_lon)]
+    eps = 1e-11  # keep edges that sit exactly on a tile boundary out of the next tile
+    ranges = []
+    for west, east in spans:
+        x0, y0 = lonlat_to_tile(max(west, -180.0), max_lat, z)
+        x1, y1 = lonlat_to_tile(min(east, 180.0) - eps, min_lat + eps, z)
+        ranges.append((x0, x1, y0, y1))
+    return ranges
+
+def count_tiles_in_bbox(min_lon, min_lat, max_lon, max_lat, z):
+    """len(tiles_in_bbox(...)) without building the list."""
+    return sum(max(x1 - x0 + 1, 0) * max(y1 - y0 + 1, 0)
+               for x0, x1, y0, y1 in tile_ranges(min_lon, min_lat, max_lon, max_lat, z))
+
+def tiles_in_bbox(min_lon, min_lat, max_lon, max_lat, z):
+    """(x, y, z) keys of every tile intersecting the bbox, x-major like mercantile.tiles."""
+    return [(x, y, z)
+            for x0, x1, y0, y1 in tile_ranges(min_lon, min_lat, max_lon, max_lat, z)
+            for x in range(x0, x1 + 1)
+            for y in range(y0, y1 + 1)]
+
+def lonlat_to_tile_coords(lons, lats, z):
+    """Fractional Web Mercator tile coordinates for arrays of lon/lat."""
+    n = 1 << z
+    lat_rad = np.radians(np.clip(lats, -MAX_LAT, MAX_LAT))
+    fx = (np.asarray(lons, dtype=np.float64) + 180.0) / 360.0 * n
+    fy = (1.0 - np.log(np.tan(lat_rad) + 1.0 / np.cos(lat_rad)) / np.pi) / 2.0 * n
+    return fx, fy
+
+def split_tile_coords(f, n):
+    """Split fractional tile coordinates into tile index and in-tile pixel position."""
+    t = np.clip(np.floor(f).astype(np.int64), 0, n - 1)
+    p = np.clip((f - t) * TILE_SIZE - 0.5, 0, TILE_SIZE - 1)
+    return t, p
+
+def tile_runs(t):
+    """Split a per-row or per-column tile index array into (tile, start, stop) runs."""
+    bounds = np.flatnonzero(np.diff(t)) + 1
+    starts = np.concatenate(([0], bounds))
+    stops = np.concatenate((bounds, [len(t)]))
+    return [(int(t[a]), int(a), int(b)) for a, b in zip(starts, stops)]
+
+def stitch_texture(min_lon, min_lat, max_lon, max_lat, z, width, height):
+    """
+    Resample the bbox into a single (height, width, 3) uint8 texture.
+    Tile x depends only on the column and tile y only on the row, so the
+    output splits into a grid of rectangles, one per tile, each filled with
+    a single vectorized gather by the configured SAMPLER.
+
+    The touched tiles are preloaded in a list; the tile for output pixel
+    (i, j) is tiles[y_idx[i] * nx + x_idx[j]]. Only the Numba and GPU
+    kernels need them copied into a single (ny * nx, 256, 256, 3) stack.
+    """
+    n = 1 << z
+    if min_lon > max_lon:  # crosses the antimeridian: go east from min_lon, not the long way round
+        max_lon += 360.0
+    lons = min_lon + (np.arange(width) + 0.5) / width * (max_lon - min_lon)
+    lons = (lons + 180.0) % 360.0 - 180.0
+    lats = max_lat - (np.arange(height) + 0.5) / height * (max_lat - min_lat)
+    fx, fy = lonlat_to_tile_coords(lons, lats, z)
+    x_tile, px = split_tile_coords(fx, n)
+    y_tile, py = split_tile_coords(fy, n)
+
+    x_keys, x_idx = np.unique(x_tile, return_inverse=True)
+    y_keys, y_idx = np.unique(y_tile, return_inverse=True)
+    nx = len(x_keys)
+    if nx * len(y_keys) > MAX_BBOX_TILES:
+        raise ValueError(f"texture covers more than {MAX_BBOX_TILES} tiles")
+    tiles = load_tiles([(int(tx), int(ty), z) for ty in y_keys for tx in x_keys])
+
+    final_texture = np.empty((height, width, 3), dtype=np.uint8)
+    use_gpu = SAMPLER is bilinear_vec and height * width >= GPU_MIN_PIXELS and gpu_available()
+    if SAMPLER is bilinear_vec and (use_gpu or njit is not None):
+        tile_stack = np.stack(tiles)
+        if use_gpu:
+            try:
+                stitch_gpu(x_idx, px, y_idx, py, tile_stack, nx, final_texture)
+                return final_texture
+            except GPU_ERRORS as e:
+                app.logger.warning("GPU stitch failed, falling back to CPU: %s", e)
+        if njit is not None:
+            with _stitch_kernel_lock:
+                _stitch_kernel(x_idx, bilinear_terms(px), y_idx, bilinear_terms(py),
+                               tile_stack, nx, final_texture)
+            return final_texture
+
+    col_runs = tile_runs(x_idx)
+    for iy, r0, r1 in tile_runs(y_idx):
+        for ix, c0, c1 in col_runs:
+            tile = tiles[iy * nx + ix]
+            final_texture[r0:r1, c0:c1] = SAMPLER(tile, px[c0:c1], py[r0:r1])
+    return final_texture
+
+def bilinear_terms(p):
+    """
+    Neighbouring pixel indices and float32 blend weights for positions p.
+    Every bilinear path (bilinear_vec, the Numba kernel, the GPU) blends in
+    float32 from these and rounds half to even, so they agree exactly.
+    """
+    i0 = p.astype(np.int32)
+    i1 = np.minimum(i0 + 1, TILE_SIZE - 1)
+    return i0, i1, (p - i0).astype(np.float32)
+
+def bilinear_vec(tile, px, py):
+    """
+    Bilinearly sample a (256,256,3) tile on the grid px (columns) x py (rows),
+    returning a (len(py), len(px), 3) uint8 slab. Gathers stay uint8 and
+    are promoted to float32 only for the blend.
+    """
+    x0, x1, fx = bilinear_terms(px)
+    y0, y1, fy = bilinear_terms(py)
+    fx = fx[None, :, None]
+    fy = fy[:, None, None]
+    y0, y1 = y0[:, None], y1[:, None]
+    c00 = tile[y0, x0].astype(np.float32)
+    c10 = tile[y0, x1].astype(np.float32)
+    c01 = tile[y1, x0].astype(np.float32)
+    c11 = tile[y1, x1].astype(np.float32)
+    slab = (c00 * (1 - fx) + c10 * fx) * (1 - fy) + (c01 * (1 - fx) + c11 * fx) * fy
+    return np.rint(slab).astype(np.uint8)
+
+def nearest_vec(tile, px, py):
+    """Nearest-neighbour counterpart of bilinear_vec."""
+    return tile[np.rint(py).astype(np.int32)[:, None], np.rint(px).astype(np.int32)]
+
+# Texture sampling strategy for /bbox, picked once at startup
+SAMPLERS = {"nearest": nearest_vec, "bilinear": bilinear_vec}
+try:
+    SAMPLER = SAMPLERS[os.environ.get("SAMPLER", "bilinear")]
+except KeyError as e:
+    raise ValueError(f"SAMPLER must be one of {', '.join(SAMPLERS)}, not {e.args[0]!r}") from None
+
+# The kernel already spreads over every core, and numba's default workqueue
+# threading layer aborts when gthread workers enter it concurrently.
+_stitch_kernel_lock = threading.Lock()
+
+if njit is not None:
+    # no fastmath: reassociating the blend would make it differ from bilinear_vec
+    @njit(parallel=True, cache=True)
+    def _stitch_kernel(x_idx, x_terms, y_idx, y_terms, tile_stack, nx, out):
+        """
+        Bilinear stitch into out, parallel over output rows. x_terms and
+        y_terms come from bilinear_terms, and the blend is the same float32
+        expression as bilinear_vec's.
+        """
+        x0, x1, wx = x_terms
+        y0, y1, wy = y_terms
+        one = np.float32(1)
+        for i in prange(y_idx.shape[0]):
+            row = y_idx[i] * nx
+            for j in range(x_idx.shape[0]):
+                k = row + x_idx[j]
+                for c in range(3):
+                    c00 = np.float32(tile_stack[k, y0[i], x0[j], c])
+                    c10 = np.float32(tile_stack[k, y0[i], x1[j], c])
+                    c01 = np.float32(tile_stack[k, y1[i], x0[j], c])
+                    c11 = np.float32(tile_stack[k, y1[i], x1[j], c])
+                    v = ((c00 * (one - wx[j]) + c10 * wx[j]) * (one - wy[i])
+                         + (c01 * (one - wx[j]) + c11 * wx[j]) * wy[i])
+                    out[i, j, c] = np.uint8(np.rint(v))
+        return out
+
+@lru_cache(maxsize=None)
+def gpu_available():
+    """
+    Whether a CUDA device is usable. cupy imports fine without a GPU or
+    driver, so probe once per process; lazily, because initializing CUDA in
+    the preloading gunicorn master would break it in the forked workers.
+    """
+    if not USE_GPU:
+        return False
+    try:
+        return cp.cuda.runtime.getDeviceCount() > 0
+    except GPU_ERRORS:
+        return False
+
+def stitch_gpu(x_idx, px, y_idx, py, tile_stack, nx, out):
+    """
+    Bilinear stitch into out on the GPU. The tile stack and per-column terms
+    are uploaded once; rows are then processed in chunks of about
+    GPU_CHUNK_PIXELS output pixels so device memory stays bounded for large
+    textures, and each finished chunk is copied straight into out.
+
+    The terms come from bilinear_terms on the host and each step of the
+    blend is a separate float32 array op, so the result matches bilinear_vec.
+    """
+    tiles = cp.asarray(tile_stack)
+    x_idx = cp.asarray(x_idx, dtype=cp.int32)[None, :]
+    x0, x1, fx = (cp.asarray(t) for t in bilinear_terms(px))
+    x0, x1, fx = x0[None, :], x1[None, :], fx[None, :, None]
+    y0_all, y1_all, fy_all = bilinear_terms(py)
+
+    step = max(1, GPU_CHUNK_PIXELS // out.shape[1])
+    for r0 in range(0, out.shape[0], step):
+        r1 = min(r0 + step, out.shape[0])
+        k = cp.asarray(y_idx[r0:r1], dtype=cp.int32)[:, None] * nx + x_idx
+        y0 = cp.asarray(y0_all[r0:r1])[:, None]
+        y1 = cp.asarray(y1_all[r0:r1])[:, None]
+        fy = cp.asarray(fy_all[r0:r1])[:, None, None]
+
+        c00 = tiles[k, y0, x0].astype(cp.float32)
+        c10 = tiles[k, y0, x1].astype(cp.float32)
+        c01 = tiles[k, y1, x0].astype(cp.float32)
+        c11 = tiles[k, y1, x1].astype(cp.float32)
+        slab = (c00 * (1 - fx) + c10 * fx) * (1 - fy) + (c01 * (1 - fx) + c11 * fx) * fy
+        cp.rint(slab).astype(cp.uint8).get(out=out[r0:r1])
+    return out
+
+def parse_texture_size(args):
+    """Return (width, height) from texture_size or texture_width/texture_height, or None."""
+    if "texture_size" in args:
+        size = int(args["texture_size"])
+        width, height = size, size
+    elif "texture_width" in args or "texture_height" in args:
+        width = int(args["texture_width"])
+        height = int(args["texture_height"])
+    else:
+        return None
+    if not (0 < width <= MAX_TEXTURE_SIZE and 0 < height <= MAX_TEXTURE_SIZE):
+        raise ValueError(f"texture size must be between 1 and {MAX_TEXTURE_SIZE}")
+    return width, height
+
+def fast_json(obj, status=200):
+    """JSON response via orjson; ndarrays are serialized natively, without tolist()."""
+    return Response(orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY),
+                    status=status, mimetype="application/json")
+
+def make_etag(*parts):
+    return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+def tile_etag(z, x, y, variant):
+    """ETag for a tile already in the disk cache, or None if it is not cached yet."""
+    try:
+        mtime = os.stat(cache_path(z, x, y)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return make_etag(z, x, y, mtime, variant)
+
+def not_modified(etag):
+    """A 304 response if the client's If-None-Match already has etag, else None."""
+    if etag is None or not request.if_none_match.contains(etag):
+        return None
+    return with_cache_headers(Response(status=304), etag)
+
+def with_cache_headers(resp, etag):
+    if etag is not None:
+        resp.set_etag(etag)
+        resp.headers["Cache-Control"] = CACHE_CONTROL
+    return resp
+
+def send_cached_tile(z, x, y):
+    """
+    Send a tile's cached JPEG without reading it into Python. Behind nginx
+    with X_ACCEL_PREFIX set, the file transfer is handed off to the proxy.
+    """
+    filename = os.path.basename(cache_path(z, x, y))
+    if X_ACCEL_PREFIX:
+        resp = Response(mimetype="image/jpeg")
+        resp.headers["X-Accel-Redirect"] = X_ACCEL_PREFIX + filename
+        resp.headers["Cache-Control"] = CACHE_CONTROL
+        return resp
+    # send_from_directory resolves relative paths against the app root, not the cwd
+    return send_from_directory(os.path.abspath(TILE_CACHE_DIR), filename,
+                               mimetype="image/jpeg", conditional=True, max_age=86400)
+
+def iter_buffer(buf):
+    """A BytesIO's contents in RESPONSE_CHUNK pieces, without getvalue()'s full copy."""
+    buf.seek(0)
+    while chunk := buf.read(RESPONSE_CHUNK):
+        yield chunk
+
+def iter_raw(arr):
+    """Raw bytes of arr a band of rows at a time, without tobytes()'s full copy."""
+    rows = max(1, RESPONSE_CHUNK // arr[0].nbytes)
+    for r0 in range(0, len(arr), rows):
+        yield arr[r0:r0 + rows].tobytes()
+
+def raw_response(arr):
+    """uint8 array as application/octet-stream, with its shape and dtype in headers."""
+    resp = Response(iter_raw(arr), mimetype="application/octet-stream")
+    resp.content_length = arr.nbytes
+    resp.headers["X-Texture-Shape"] = ",".join(str(d) for d in arr.shape)
+    resp.headers["X-Texture-Dtype"] = str(arr.dtype)
+    return resp
+
+def texture_response(final_texture, fmt):
+    """
+    Encode a stitched texture as a PNG, raw uint8 bytes, or legacy JSON.
+    PNG and raw bodies are streamed in RESPONSE_CHUNK pieces instead of
+    being copied whole into a bytes object next to the texture.
+    """
+    if fmt == "png":
+        buf = BytesIO()
+        Image.fromarray(final_texture).save(buf, format="PNG", compress_level=1)
+        size = buf.tell()
+        resp = Response(iter_buffer(buf), mimetype="image/png")
+        resp.content_length = size
+        return resp
+    if fmt == "raw":
+        return raw_response(final_texture)
+    height, width = final_texture.shape[:2]
+    return fast_json({
+        "width": width,
+        "height": height,
+        "texture": final_texture
+    })
 
 # =====================
 # Routes
@@ -54,8 +534,8 @@ def load_or_fetch_tile(x, y, z):
 def index():
     return jsonify({
         "endpoints": {
-            "/tile": "/tile?x=<x>&y=<y>&z=<z>",
-            "/bbox": "/bbox?min_lon=<>&min_lat=<>&max_lon=<>&max_lat=<>&z=<zoom>"
+            "/tile": "/tile?x=<x>&y=<y>&z=<z>[&bin=1|&jpeg=1]",
+            "/bbox": "/bbox?min_lon=<>&min_lat=<>&max_lon=<>&max_lat=<>&z=<zoom>[&texture_size=<px>]"
         }
     })
 
@@ -64,20 +544,48 @@ def get_tile():
     """
     Request a single tile:
     /tile?x=2100&y=1400&z=12
-    Returns JSON array of [ [ [R,G,B], ... ], ... ]
+    Returns { "shape": [256,256,3], "dtype": "uint8", "data": base64(RGB bytes) }
+    Decode with np.frombuffer(base64.b64decode(d["data"]), dtype=np.uint8).reshape(d["shape"])
+
+    With bin=1 the raw RGB bytes are returned as application/octet-stream,
+    with X-Texture-Shape and X-Texture-Dtype headers as for /bbox format=raw.
+    With jpeg=1 the cached JPEG is sent as-is, straight from disk.
     """
     try:
         x = int(request.args["x"])
         y = int(request.args["y"])
         z = int(request.args["z"])
     except (KeyError, ValueError):
-        return jsonify({"error": "Missing or invalid x,y,z"}), 400
+        return fast_json({"error": "Missing or invalid x,y,z"}, 400)
+    binary = request.args.get("bin") == "1"
+
+    if request.args.get("jpeg") == "1":
+        try:
+            ensure_tile_cached(x, y, z)
+        except Exception as e:
+            return fast_json({"error": str(e)}, 502)
+        return send_cached_tile(z, x, y)
+
+    etag = tile_etag(z, x, y, binary)
+    resp = not_modified(etag)
+    if resp is not None:
+        return resp
 
     try:
         data = load_or_fetch_tile(x, y, z)
     except Exception as e:
-        return jsonify({"error": str(e)}), 502
-    return jsonify(data)
+        return fast_json({"error": str(e)}, 502)
+    if binary:
+        resp = raw_response(data)
+    else:
+        resp = fast_json({
+            "shape": list(data.shape),
+            "dtype": str(data.dtype),
+            "data": base64.b64encode(data.tobytes()).decode()
+        })
+    if etag is None:  # the tile was not on disk until load_or_fetch_tile fetched it
+        etag = tile_etag(z, x, y, binary)
+    return with_cache_headers(resp, etag)
 
 @app.route("/bbox", methods=["GET"])
 def get_bbox():
@@ -85,33 +593,71 @@ def get_bbox():
     Request a bounding box of tiles:
     /bbox?min_lon=-74.1&min_lat=40.6&max_lon=-73.7&max_lat=40.9&z=12
     Returns { "tiles": [ {x,y,z,data}, ... ] }
+
+    With texture_size=<px> (or texture_width=<px>&texture_height=<px>) the
+    tiles are stitched and resampled into a single texture instead, encoded
+    according to format=png|raw|json (default png):
+      png  -> image/png
+      raw  -> application/octet-stream of uint8 RGB bytes, shape in X-Texture-Shape
+      json -> { "width": W, "height": H, "texture": [ [ [R,G,B], ... ], ... ] }
     """
     try:
         min_lon = float(request.args["min_lon"])
         min_lat = float(request.args["min_lat"])
         max_lon = float(request.args["max_lon"])
         max_lat = float(request.args["max_lat"])
+        if not all(math.isfinite(v) for v in (min_lon, min_lat, max_lon, max_lat)):
+            raise ValueError("bbox must be finite")
+        # min_lon > max_lon is allowed and crosses the antimeridian; inverted latitudes are not
+        if not (-180.0 <= min_lon <= 180.0 and -180.0 <= max_lon <= 180.0 and min_lat <= max_lat):
+            raise ValueError("bbox out of range")
         z = int(request.args.get("z", 12))
+        if not 0 <= z <= MAX_ZOOM:
+            raise ValueError(z)
+        texture_size = parse_texture_size(request.args)
+        fmt = request.args.get("format", "png")
+        if fmt not in ("png", "raw", "json"):
+            raise ValueError(fmt)
     except (KeyError, ValueError):
-        return jsonify({"error": "Invalid bbox parameters"}), 400
+        return fast_json({"error": "Invalid bbox parameters"}, 400)
 
-    tile_list = []
-    for tile in mercantile.tiles(min_lon, min_lat, max_lon, max_lat, z):
+    if count_tiles_in_bbox(min_lon, min_lat, max_lon, max_lat, z) > MAX_BBOX_TILES:
+        return fast_json({"error": f"bbox covers more than {MAX_BBOX_TILES} tiles"}, 400)
+
+    etag = make_etag(min_lon, min_lat, max_lon, max_lat, z, texture_size, fmt, SAMPLER.__name__)
+    resp = not_modified(etag)
+    if resp is not None:
+        return resp
+
+    if texture_size is not None:
+        width, height = texture_size
         try:
-            data = load_or_fetch_tile(tile.x, tile.y, tile.z)
+            final_texture = stitch_texture(min_lon, min_lat, max_lon, max_lat, z, width, height)
+        except ValueError as e:
+            return fast_json({"error": str(e)}, 400)
         except Exception as e:
-            return jsonify({"error": f"Failed tile {tile}: {e}"}), 502
+            return fast_json({"error": f"Failed to build texture: {e}"}, 502)
+        return with_cache_headers(texture_response(final_texture, fmt), etag)
+
+    keys = tiles_in_bbox(min_lon, min_lat, max_lon, max_lat, z)
+    try:
+        tiles = load_tiles(keys)
+    except Exception as e:
+        return fast_json({"error": str(e)}, 502)
+
+    tile_list = []
+    for (x, y, tz), data in zip(keys, tiles):
         tile_list.append({
-            "x": tile.x,
-            "y": tile.y,
-            "z": tile.z,
+            "x": x,
+            "y": y,
+            "z": tz,
             "data": data
         })
 
-    return jsonify({"tiles": tile_list})
+    return with_cache_headers(fast_json({"tiles": tile_list}), etag)
 
 # =====================
-# Run locally
+# Run locally (production: gunicorn -c gunicorn.conf.py app:app)
 # =====================
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)))
@@ -0,0 +1,11 @@
+import os
+
+# Tile fetches are I/O bound, so run threaded workers rather than Flask's dev server.
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+# Import the app once in the master so workers share its pages copy-on-write.
+# The fetch pool and HTTP sessions are created lazily inside each worker.
+preload_app = True
+timeout = 120
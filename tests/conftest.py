@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    # app creates its tile cache directory relative to the cwd on import
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("cache"))
+    try:
+        import app
+    finally:
+        os.chdir(cwd)
+    return app
@@ -0,0 +1,127 @@
+import base64
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+
+BBOX = "min_lon=-74.1&min_lat=40.6&max_lon=-73.7&max_lat=40.9&z=10"
+
+
+def tile_jpeg(x, y, z):
+    rng = np.random.default_rng(x * 100003 + y * 7 + z)
+    buf = BytesIO()
+    Image.fromarray(rng.integers(0, 256, (256, 256, 3), dtype=np.uint8)).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+@pytest.fixture
+def client(app_module, monkeypatch, tmp_path):
+    monkeypatch.setattr(app_module, "TILE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(app_module, "fetch_tile_jpeg", tile_jpeg)
+    app_module._tile_lru.clear()
+    yield app_module.app.test_client()
+    app_module._tile_lru.clear()
+
+
+def expected_tile(app_module, x, y, z):
+    return app_module.decode_jpeg(tile_jpeg(x, y, z))
+
+
+def test_tile_base64_round_trip(app_module, client):
+    r = client.get("/tile?x=10&y=20&z=6")
+    assert r.status_code == 200
+    d = r.get_json()
+    assert d["shape"] == [256, 256, 3] and d["dtype"] == "uint8"
+    data = np.frombuffer(base64.b64decode(d["data"]), dtype=d["dtype"]).reshape(d["shape"])
+    np.testing.assert_array_equal(data, expected_tile(app_module, 10, 20, 6))
+
+
+def test_tile_bin(app_module, client):
+    r = client.get("/tile?x=10&y=20&z=6&bin=1")
+    assert r.status_code == 200
+    assert r.mimetype == "application/octet-stream"
+    assert r.headers["X-Texture-Shape"] == "256,256,3"
+    assert r.headers["X-Texture-Dtype"] == "uint8"
+    assert r.content_length == len(r.data) == 256 * 256 * 3
+    np.testing.assert_array_equal(np.frombuffer(r.data, dtype=np.uint8).reshape(256, 256, 3),
+                                  expected_tile(app_module, 10, 20, 6))
+
+
+@pytest.mark.parametrize("query", ["", "&bin=1"])
+def test_tile_if_none_match(app_module, client, monkeypatch, query):
+    url = "/tile?x=10&y=20&z=6" + query
+    etag = client.get(url).headers["ETag"]
+
+    def no_load(*args):
+        raise AssertionError("a 304 must not load the tile")
+    monkeypatch.setattr(app_module, "load_or_fetch_tile", no_load)
+    r = client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.headers["ETag"] == etag
+    assert r.data == b""
+
+
+def test_tile_etag_differs_by_variant(client):
+    json_etag = client.get("/tile?x=10&y=20&z=6").headers["ETag"]
+    bin_etag = client.get("/tile?x=10&y=20&z=6&bin=1").headers["ETag"]
+    assert json_etag != bin_etag
+
+
+def test_tile_bad_wmts_body_is_not_cached(app_module, client, monkeypatch, tmp_path):
+    monkeypatch.setattr(app_module, "fetch_tile_jpeg", lambda x, y, z: b"<html>rate limited</html>")
+    assert client.get("/tile?x=1&y=1&z=1").status_code == 502
+    assert client.get("/tile?x=1&y=1&z=1&jpeg=1").status_code == 502
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("fmt", ["png", "raw", "json"])
+def test_bbox_texture_formats(client, fmt):
+    r = client.get(f"/bbox?{BBOX}&texture_width=48&texture_height=32&format={fmt}")
+    assert r.status_code == 200
+    if fmt == "png":
+        assert r.mimetype == "image/png"
+        texture = np.asarray(Image.open(BytesIO(r.data)))
+    elif fmt == "raw":
+        assert r.headers["X-Texture-Shape"] == "32,48,3"
+        assert r.headers["X-Texture-Dtype"] == "uint8"
+        texture = np.frombuffer(r.data, dtype=np.uint8).reshape(32, 48, 3)
+    else:
+        d = r.get_json()
+        assert (d["width"], d["height"]) == (48, 32)
+        texture = np.array(d["texture"], dtype=np.uint8)
+    assert texture.shape == (32, 48, 3)
+    assert texture.any()
+
+
+def test_bbox_formats_agree(client):
+    url = f"/bbox?{BBOX}&texture_size=40"
+    raw = np.frombuffer(client.get(url + "&format=raw").data, dtype=np.uint8).reshape(40, 40, 3)
+    png = np.asarray(Image.open(BytesIO(client.get(url + "&format=png").data)))
+    as_json = np.array(client.get(url + "&format=json").get_json()["texture"], dtype=np.uint8)
+    np.testing.assert_array_equal(raw, png)
+    np.testing.assert_array_equal(raw, as_json)
+
+
+def test_bbox_if_none_match(app_module, client, monkeypatch):
+    url = f"/bbox?{BBOX}&texture_size=32"
+    etag = client.get(url + "&format=raw").headers["ETag"]
+
+    def no_stitch(*args):
+        raise AssertionError("a 304 must not stitch the texture")
+    monkeypatch.setattr(app_module, "stitch_texture", no_stitch)
+    r = client.get(url + "&format=raw", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.headers["ETag"] == etag
+    assert client.get(url + "&format=png", headers={"If-None-Match": etag}).status_code != 304
+
+
+@pytest.mark.parametrize("query", [
+    "min_lon=-180&min_lat=85&max_lon=180&max_lat=-85&z=22&texture_size=8192",
+    "min_lon=-540&min_lat=0&max_lon=-179.99&max_lat=0.0001&z=22&texture_size=8192",
+    "min_lon=nan&min_lat=0&max_lon=1&max_lat=1&z=3",
+    "min_lon=0&min_lat=0&max_lon=1&max_lat=1&z=23",
+    f"{BBOX}&texture_size=64&format=gif",
+])
+def test_bbox_rejects_bad_parameters(client, query):
+    assert client.get("/bbox?" + query).status_code == 400
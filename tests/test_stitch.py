@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+
+def random_stitch_inputs(seed, nx=3, ny=2, width=97, height=61):
+    rng = np.random.default_rng(seed)
+    tile_stack = rng.integers(0, 256, (nx * ny, 256, 256, 3), dtype=np.uint8)
+    x_idx = np.sort(rng.integers(0, nx, width))
+    y_idx = np.sort(rng.integers(0, ny, height))
+    px = rng.uniform(0, 255, width)
+    py = rng.uniform(0, 255, height)
+    # half-pixel positions blend two neighbours equally, which hits exact .5 ties
+    px[::5] = np.floor(px[::5]) + 0.5
+    py[::4] = np.floor(py[::4]) + 0.5
+    px[-1], py[-1] = 255.0, 255.0
+    return x_idx, px, y_idx, py, tile_stack, nx
+
+
+def stitch_with_bilinear_vec(app_module, x_idx, px, y_idx, py, tile_stack, nx):
+    out = np.empty((len(py), len(px), 3), dtype=np.uint8)
+    for iy, r0, r1 in app_module.tile_runs(y_idx):
+        for ix, c0, c1 in app_module.tile_runs(x_idx):
+            out[r0:r1, c0:c1] = app_module.bilinear_vec(tile_stack[iy * nx + ix], px[c0:c1], py[r0:r1])
+    return out
+
+
+def test_bilinear_vec_matches_float64_reference(app_module):
+    x_idx, px, y_idx, py, tile_stack, nx = random_stitch_inputs(0, nx=1, ny=1)
+    tile = tile_stack[0].astype(np.float64)
+    x0, y0 = px.astype(int), py.astype(int)
+    x1, y1 = np.minimum(x0 + 1, 255), np.minimum(y0 + 1, 255)
+    fx, fy = (px - x0)[None, :, None], (py - y0)[:, None, None]
+    y0, y1 = y0[:, None], y1[:, None]
+    ref = (tile[y0, x0] * (1 - fx) + tile[y0, x1] * fx) * (1 - fy) + (tile[y1, x0] * (1 - fx) + tile[y1, x1] * fx) * fy
+    out = app_module.bilinear_vec(tile_stack[0], px, py)
+    # float32 blending may round the other way only where float64 lands on a .5 tie
+    assert np.abs(out.astype(int) - np.rint(ref)).max() <= 1
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_numba_kernel_matches_bilinear_vec(app_module, seed):
+    if app_module.njit is None:
+        pytest.skip("numba is not installed")
+    x_idx, px, y_idx, py, tile_stack, nx = random_stitch_inputs(seed)
+    out = np.empty((len(py), len(px), 3), dtype=np.uint8)
+    app_module._stitch_kernel(x_idx, app_module.bilinear_terms(px), y_idx, app_module.bilinear_terms(py),
+                              tile_stack, nx, out)
+    np.testing.assert_array_equal(out, stitch_with_bilinear_vec(app_module, x_idx, px, y_idx, py, tile_stack, nx))
+
+
+def test_gpu_stitch_matches_bilinear_vec(app_module):
+    pytest.importorskip("cupy")
+    if not app_module.gpu_available():
+        pytest.skip("no usable CUDA device, or TILE_GPU is not set")
+    x_idx, px, y_idx, py, tile_stack, nx = random_stitch_inputs(0)
+    out = np.empty((len(py), len(px), 3), dtype=np.uint8)
+    app_module.stitch_gpu(x_idx, px, y_idx, py, tile_stack, nx, out)
+    np.testing.assert_array_equal(out, stitch_with_bilinear_vec(app_module, x_idx, px, y_idx, py, tile_stack, nx))
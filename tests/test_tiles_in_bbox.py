@@ -0,0 +1,30 @@
+import random
+
+import pytest
+
+
+# Expected keys recorded from mercantile.tiles, which tiles_in_bbox replaces
+MERCANTILE_CASES = [
+    ((-74.1, 40.6, -73.7, 40.9, 10), [(301, 384, 10), (301, 385, 10), (302, 384, 10), (302, 385, 10)]),
+    ((179, -1, -179, 1, 6), [(0, 31, 6), (0, 32, 6), (63, 31, 6), (63, 32, 6)]),
+    ((190, 10, 100, 20, 3), [(x, 3, 3) for x in range(8)]),
+    ((-200, -10, -170, 10, 2), [(0, 1, 2), (0, 2, 2)]),
+    ((0, 0, 90, 85.0511287798, 2), [(2, 0, 2), (2, 1, 2)]),
+    ((-180, -90, 180, 90, 1), [(0, 0, 1), (0, 1, 1), (1, 0, 1), (1, 1, 1)]),
+    ((45, -45, 45, -45, 4), []),
+]
+
+
+@pytest.mark.parametrize("bbox,expected", MERCANTILE_CASES)
+def test_tiles_in_bbox_matches_mercantile(app_module, bbox, expected):
+    assert app_module.tiles_in_bbox(*bbox) == expected
+
+
+def test_tiles_in_bbox_random_parity(app_module):
+    mercantile = pytest.importorskip("mercantile")
+    rng = random.Random(7)
+    for _ in range(2000):
+        z = rng.randint(0, 8)
+        bbox = (rng.uniform(-400, 400), rng.uniform(-95, 95), rng.uniform(-400, 400), rng.uniform(-95, 95), z)
+        expected = [(t.x, t.y, t.z) for t in mercantile.tiles(*bbox)]
+        assert app_module.tiles_in_bbox(*bbox) == expected, bbox